@@ -0,0 +1,118 @@
+"""
+Compiled kernels for BookKeeper and MarketData hot paths.
+
+Numba is an optional dependency (``pip install aequilibrium[jit]``). When it
+is not installed the kernels below are plain Python functions, and
+callers keep to their NumPy implementations instead of calling them.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+# fastmath=True minus 'nnan'/'ninf': kernels must still propagate NaN/inf
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+def _jit(func):
+    """Compile func with Numba when available, else return it unchanged."""
+    if NUMBA_AVAILABLE:
+        # error_model='numpy': x / 0.0 gives inf/NaN, as in NumPy, rather
+        # than raising ZeroDivisionError
+        return njit(cache=True, fastmath=_FASTMATH,
+                    error_model="numpy")(func)
+    return func
+
+
+def is_kernel_array(*arrays) -> bool:
+    """True if every array is a 1-D float64 C-contiguous NumPy array."""
+    for a in arrays:
+        if not (isinstance(a, np.ndarray) and a.ndim == 1
+                and a.dtype == np.float64 and a.flags.c_contiguous):
+            return False
+    return True
+
+
+@_jit
+def portfolio_value(h):
+    """Return v_t = 1^T h_t with a single accumulation loop."""
+    s = 0.0
+    for i in range(h.shape[0]):
+        s += h[i]
+    return s
+
+
+@_jit
+def simulate(h0, r, out_h, out_v, out_l):
+    """
+    Roll h0 forward through every row of r.
+
+    Writes holdings into out_h (T, n+1), values into out_v (T,) and
+    leverage into out_l (T,). Leverage is NaN where the value is zero.
+    """
+    n1 = h0.shape[0]
+    for t in range(r.shape[0]):
+        v = 0.0
+        gross = 0.0
+        for i in range(n1):
+            prev = h0[i] if t == 0 else out_h[t - 1, i]
+            h = prev * (1.0 + r[t, i])
+            out_h[t, i] = h
+            v += h
+            if i < n1 - 1:
+                gross += abs(h)
+        out_v[t] = v
+        out_l[t] = gross / abs(v) if v != 0.0 else np.nan
+
+
+@_jit
+def full_step(h, r, h_next, w_next):
+    """
+    Run one full BookKeeper period over h in a single pass.
+
+    Writes h_{t+1} into h_next and w_{t+1} into w_next, and returns
+    (v_{t+1}, leverage, portfolio return). Weights and leverage are NaN
+    when v_{t+1} is zero; the return is NaN when v_t is zero.
+    """
+    n1 = h.shape[0]
+    v = 0.0
+    v_next = 0.0
+    gross = 0.0
+    for i in range(n1):
+        x = h[i] * (1.0 + r[i])
+        h_next[i] = x
+        v += h[i]
+        v_next += x
+        if i < n1 - 1:
+            gross += abs(x)
+
+    if v_next != 0.0:
+        inv = 1.0 / v_next
+        for i in range(n1):
+            w_next[i] = h_next[i] * inv
+        lev = gross * abs(inv)
+    else:
+        for i in range(n1):
+            w_next[i] = np.nan
+        lev = np.nan
+
+    ret = (v_next - v) / v if v != 0.0 else np.nan
+    return v_next, lev, ret
+
+
+@_jit
+def pct_change(a, out):
+    """
+    Write the row-over-row change a[t] / a[t-1] - 1 into out.
+
+    out has one row fewer than a. Rows are walked in order so a row-major
+    out is filled sequentially; NaN prices propagate to NaN returns.
+    """
+    for t in range(1, a.shape[0]):
+        for j in range(a.shape[1]):
+            out[t - 1, j] = a[t, j] / a[t - 1, j] - 1.0
@@ -1,5 +1,10 @@
 import numpy as np
 
+from aequilibrium import _kernels
+
+# Below this many holdings a plain accumulation loop beats pairwise summation
+_SMALL_N = 64
+
 
 class BookKeeper:
     """
@@ -21,8 +26,35 @@ class BookKeeper:
         -------
         float
             Total portfolio value v_t = 1^T h_t
+
+        Notes
+        -----
+        - Small float64 arrays are summed by a compiled loop when Numba
+          is installed; larger ones use NumPy's pairwise summation
         """
-        vt = holdings.sum()
+        if (_kernels.NUMBA_AVAILABLE and _kernels.is_kernel_array(holdings)
+                and holdings.shape[0] < _SMALL_N):
+            return float(_kernels.portfolio_value(holdings))
+        vt = float(np.add.reduce(holdings, dtype=np.float64))
+        return vt
+
+    def portfolio_value_weighted(self, prices, shares) -> float:
+        """
+        Calculate total portfolio value from prices and share counts.
+
+        Parameters
+        ----------
+        prices : np.array, shape (n+1,)
+            Price per unit of each asset plus cash (cash price is 1.0)
+        shares : np.array, shape (n+1,)
+            Units held of each asset plus cash
+
+        Returns
+        -------
+        float
+            Total portfolio value v_t = p_t^T s_t
+        """
+        vt = float(np.vdot(prices, shares))
         return vt
 
     def compute_weights(self, holdings) -> np.array:
@@ -49,7 +81,9 @@ class BookKeeper:
             raise ValueError(
                 "Cannot compute weights: portfolio value is zero."
             )
-        wt = holdings/vt
+        # One scalar divide, then a vectorised multiply
+        inv_vt = 1.0 / vt
+        wt = holdings * inv_vt
         return wt
 
     def compute_leverage(self, weights) -> float:
@@ -72,10 +106,42 @@ class BookKeeper:
         - Cash (last element) is excluded
         - Long-only fully-invested portfolio has leverage = 1.0
         """
-        leverage = np.abs(weights[:-1]).sum()
+        leverage = float(np.abs(weights[:-1]).sum())
         return leverage
 
-    def update_portfolio(self, holdings, returns):
+    def weights_and_leverage(self, holdings):
+        """
+        Convert holdings to weights and leverage in a single pass.
+
+        Parameters
+        ----------
+        holdings : np.array, shape (n+1,)
+            Dollar holdings
+
+        Returns
+        -------
+        weights : np.array, shape (n+1,)
+            Weights w_t = h_t / v_t
+        leverage : float
+            Leverage ||w_{1:n}||_1 = ||h_{1:n}||_1 / |v_t|
+
+        Notes
+        -----
+        - Same result as compute_weights() followed by compute_leverage()
+        - Leverage is taken from the holdings directly, so no
+          intermediate weights slice is re-read
+        """
+        vt = self.portfolio_value(holdings)
+        if vt == 0:
+            raise ValueError(
+                "Cannot compute weights: portfolio value is zero."
+            )
+        inv = 1.0 / vt
+        leverage = float(np.abs(holdings[:-1]).sum()) * abs(inv)
+        wt = holdings * inv
+        return wt, leverage
+
+    def update_portfolio(self, holdings, returns, out=None, scratch=None):
         """
         Apply one period of returns to holdings (no trading).
 
@@ -85,18 +151,35 @@ class BookKeeper:
             Current holdings h_t
         returns : np.array, shape (n+1,)
             Returns for the period r_t
+        out : np.array, shape (n+1,), optional
+            Buffer to write h_{t+1} into; may be holdings itself. A new
+            array is allocated when omitted
+        scratch : np.array, shape (n+1,), optional
+            Buffer for the intermediate 1 + r_t. A temporary is allocated
+            when omitted
 
         Returns
         -------
         np.array, shape (n+1,)
-            Next period holdings h_{t+1}
+            Next period holdings h_{t+1} (out, when given)
 
         Formula
         -------
         h_{t+1} = (1 + r_t) ⊙ h_t
+
+        Notes
+        -----
+        - Passing out and scratch lets a T-step loop run without any
+          allocation; without them this is a plain broadcasting multiply
         """
-        new_holdings = holdings * (1 + returns)
-        return new_holdings
+        if out is None and scratch is None:
+            new_holdings = holdings * (1 + returns)
+            return new_holdings
+        if scratch is None:
+            scratch = np.add(returns, 1.0)
+        else:
+            np.add(returns, 1.0, out=scratch)
+        return np.multiply(holdings, scratch, out=out)
 
     def portfolio_return(self, holdings_t, holdings_t_plus_1) -> float:
         """
@@ -119,3 +202,174 @@ class BookKeeper:
         if v_t == 0:
             return np.nan
         return (v_t_plus_1 - v_t) / v_t
+
+    def step(self, holdings, returns):
+        """
+        Run one full period of accounting (no trading).
+
+        Parameters
+        ----------
+        holdings : np.array, shape (n+1,)
+            Holdings at start of period h_t
+        returns : np.array, shape (n+1,)
+            Returns for the period r_t
+
+        Returns
+        -------
+        holdings : np.array, shape (n+1,)
+            Next period holdings h_{t+1}
+        value : float
+            Next period portfolio value v_{t+1}
+        weights : np.array, shape (n+1,)
+            Next period weights w_{t+1}
+        leverage : float
+            Next period leverage ||w_{1:n}||_1
+        ret : float
+            Portfolio return R^p_t = (v_{t+1} - v_t) / v_t
+
+        Notes
+        -----
+        - Same results as update_portfolio, portfolio_value,
+          weights_and_leverage and portfolio_return, in one call
+        - Zero v_{t+1} yields NaN weights and leverage instead of
+          raising; zero v_t yields a NaN return
+        - float64 C-contiguous inputs run through a single compiled loop
+          when Numba is installed
+        """
+        if (_kernels.NUMBA_AVAILABLE
+                and _kernels.is_kernel_array(holdings, returns)
+                and holdings.shape == returns.shape):
+            h_next = np.empty_like(holdings)
+            w_next = np.empty_like(holdings)
+            v_next, leverage, ret = _kernels.full_step(
+                holdings, returns, h_next, w_next)
+            return h_next, float(v_next), w_next, float(leverage), float(ret)
+
+        h_next = self.update_portfolio(holdings, returns)
+        v_next = self.portfolio_value(h_next)
+        if v_next == 0:
+            w_next = np.full(np.shape(h_next), np.nan)
+            leverage = np.nan
+        else:
+            w_next, leverage = self.weights_and_leverage(h_next)
+        ret = self.portfolio_return(holdings, h_next)
+        return h_next, v_next, w_next, leverage, ret
+
+    def roll_forward(self, holdings0, returns_matrix):
+        """
+        Apply a full history of returns to holdings (no trading).
+
+        Parameters
+        ----------
+        holdings0 : np.array, shape (n+1,)
+            Initial holdings h_0
+        returns_matrix : np.array, shape (T, n+1)
+            Returns r_0, ..., r_{T-1}, one row per period
+
+        Returns
+        -------
+        np.array, shape (T+1, n+1)
+            Holdings history h_0, h_1, ..., h_T
+
+        Formula
+        -------
+        h_t = h_0 ⊙ prod_{s<t} (1 + r_s)
+
+        Notes
+        -----
+        - Same as calling update_portfolio() T times, with one output
+          allocation and one cumulative product
+        """
+        h0 = np.asarray(holdings0, dtype=np.float64)
+        r = np.asarray(returns_matrix, dtype=np.float64)
+        H = np.empty((r.shape[0] + 1, h0.shape[0]), dtype=np.float64)
+        H[0] = 1.0
+        np.add(r, 1.0, out=H[1:])
+        np.cumprod(H, axis=0, out=H)
+        H *= h0
+        return H
+
+    def simulate(self, holdings0, returns_matrix, dtype=np.float64):
+        """
+        Apply a full history of returns to holdings (no trading).
+
+        Batched equivalent of looping update_portfolio, compute_weights,
+        compute_leverage and portfolio_return over T periods, computed
+        with a handful of NumPy calls instead of T.
+
+        Parameters
+        ----------
+        holdings0 : np.array, shape (n+1,)
+            Initial holdings h_0
+        returns_matrix : np.array, shape (T, n+1)
+            Returns r_0, ..., r_{T-1}, one row per period
+        dtype : np.dtype, default np.float64
+            Floating-point type of every output and temporary buffer.
+            np.float32 halves memory traffic for long histories
+
+        Returns
+        -------
+        holdings : np.array, shape (T, n+1)
+            Holdings h_1, ..., h_T at the end of each period
+        values : np.array, shape (T,)
+            Portfolio values v_1, ..., v_T
+        weights : np.array, shape (T, n+1)
+            Weights w_1, ..., w_T
+        leverage : np.array, shape (T,)
+            Leverage ||w_{1:n}||_1 at the end of each period
+        returns : np.array, shape (T,)
+            Portfolio returns R^p_0, ..., R^p_{T-1}
+
+        Formula
+        -------
+        h_t = h_0 ⊙ prod_{s<t} (1 + r_s)
+
+        Notes
+        -----
+        - Periods with zero portfolio value yield NaN weights and
+          leverage instead of raising like compute_weights()
+        - A period starting from zero portfolio value has NaN return,
+          as in portfolio_return()
+        - Holdings, values and leverage come from a single compiled
+          loop when Numba is installed
+        - float32 keeps ~7 significant digits, and rounding error grows
+          along the compounding chain; prefer float64 for histories
+          longer than about 10 years of daily data
+        """
+        dtype = np.dtype(dtype)
+        if dtype.kind != "f":
+            raise ValueError(
+                f"simulate requires a floating-point dtype, got {dtype}."
+            )
+        h0 = np.ascontiguousarray(holdings0, dtype=dtype)
+        r = np.ascontiguousarray(returns_matrix, dtype=dtype)
+        T = r.shape[0]
+
+        if _kernels.NUMBA_AVAILABLE and dtype in (np.float32, np.float64):
+            H = np.empty_like(r)
+            V = np.empty(T, dtype=dtype)
+            L = np.empty(T, dtype=dtype)
+            _kernels.simulate(h0, r, H, V, L)
+        else:
+            # Reuse one buffer for 1 + r, its running product and H
+            H = np.add(r, 1, dtype=dtype)
+            np.cumprod(H, axis=0, out=H)
+            np.multiply(H, h0, out=H)
+            V = H.sum(axis=1, dtype=dtype)
+            L = None
+        # Value at the start of each period: v_0, ..., v_{T-1}
+        V_prev = np.empty_like(V)
+        if T:
+            V_prev[0] = h0.sum(dtype=dtype)
+            V_prev[1:] = V[:-1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_V = np.reciprocal(V, dtype=dtype)
+            W = np.multiply(H, inv_V[:, None], dtype=dtype)
+            R = np.divide(V - V_prev, V_prev, dtype=dtype)
+        W[V == 0] = np.nan
+        R[V_prev == 0] = np.nan
+        if L is None:
+            L = np.abs(W[:, :-1]).sum(axis=1, dtype=dtype)
+
+        return H, V, W, L, R
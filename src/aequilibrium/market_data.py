@@ -7,8 +7,237 @@ common operations like fetching data from external sources and preparing it
 for portfolio analysis or quantitative modeling.
 """
 
+import functools
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
 import yfinance as yf
 import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from aequilibrium import _kernels
+
+__all__ = ["MarketData"]
+
+# Downloads are pickled here, keyed by request; set AEQ_NO_CACHE to bypass
+_CACHE_DIR = Path(".aequilibrium_cache")
+_MEMORY_CACHE = {}
+
+_SPARK_URL = "https://query1.finance.yahoo.com/v8/finance/spark"
+# Yahoo rejects spark requests with more symbols than this
+_SPARK_MAX_SYMBOLS = 20
+_SPARK_SESSION = None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date(date):
+    """Parse a 'YYYY-MM-DD' string once; repeated dates hit the cache."""
+    return pd.to_datetime(date)
+
+
+def _spark_session():
+    """Return the module's pooled HTTP session, creating it on first use."""
+    global _SPARK_SESSION  # pylint: disable=global-statement
+    if _SPARK_SESSION is None:
+        _SPARK_SESSION = requests.Session()
+        _SPARK_SESSION.mount("https://", HTTPAdapter(pool_connections=8,
+                                                     pool_maxsize=8))
+    return _SPARK_SESSION
+
+
+def _fetch_spark(tickers, start_date, end_date, session=None):
+    """
+    Fetch adjusted close prices from Yahoo's spark endpoint.
+
+    One GET per chunk of up to 20 symbols, parsed straight into float64
+    arrays, sent through session (default: the module's pooled session).
+    Returns a frame with one column per ticker, or None if any request
+    fails or the response is not in the expected shape, so the caller can
+    fall back to yf.download. Yahoo answers with upper-case symbols;
+    columns keep the caller's spelling.
+    """
+    params = {
+        "period1": int(_parse_date(start_date).timestamp()),
+        "period2": int(_parse_date(end_date).timestamp()),
+        "interval": "1d",
+        "includeAdjustedClose": "true",
+    }
+    if session is None:
+        session = _spark_session()
+    closes = {}
+    for i in range(0, len(tickers), _SPARK_MAX_SYMBOLS):
+        chunk = tickers[i:i + _SPARK_MAX_SYMBOLS]
+        try:
+            resp = session.get(_SPARK_URL, timeout=10,
+                               params={**params, "symbols": ",".join(
+                                   t.upper() for t in chunk)})
+        except requests.RequestException:
+            return None
+        if resp.status_code != 200:
+            return None
+        try:
+            for result in resp.json()["spark"]["result"]:
+                chart = result["response"][0]
+                adj = chart["indicators"]["adjclose"][0]["adjclose"]
+                # Bar timestamps are UTC; shift to exchange time for the date
+                ts = np.asarray(chart["timestamp"], dtype=np.int64)
+                dates = pd.to_datetime(ts + chart["meta"]["gmtoffset"],
+                                       unit="s").normalize()
+                values = np.fromiter(
+                    (np.nan if v is None else v for v in adj),
+                    dtype=np.float64, count=len(adj))
+                close = pd.Series(values, index=dates)
+                closes[result["symbol"]] = close[
+                    ~close.index.duplicated(keep="last")]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    if set(closes) != {t.upper() for t in tickers}:
+        return None
+    prices = pd.DataFrame({t: closes[t.upper()] for t in tickers})
+    prices.index.name = "Date"
+    return prices
+
+
+def _download_close(tickers, start_date, end_date, session=None,
+                    yf_session=None):
+    """
+    Download adjusted close prices, via spark or else yf.download.
+
+    Returns a frame with one column per ticker, in the requested order.
+    All tickers go to yf.download in a single call, with the progress bar
+    off and yfinance's thread pool only used when there are enough tickers
+    to amortize its setup. Per-ticker download errors are copied out of
+    yfinance's global registry into ``attrs["errors"]``. session is used
+    for spark and yf_session for yf.download.
+    """
+    prices = _fetch_spark(tickers, start_date, end_date, session)
+    if prices is not None:
+        prices.attrs["errors"] = {}
+        return prices
+
+    data = yf.download(tickers, start=start_date, end=end_date,
+                       auto_adjust=True, multi_level_index=False,
+                       progress=False, threads=len(tickers) > 4,
+                       session=yf_session)
+    # yf.download resets shared._ERRORS on every call, so snapshot it now.
+    # It upper-cases symbols, so look them up that way and report them
+    # under the caller's spelling
+    failed = yf.shared._ERRORS  # pylint: disable=protected-access
+    errors = {t: failed[t.upper()] for t in tickers if t.upper() in failed}
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Single ticker: columns are the price fields themselves, so build
+        # the frame directly instead of a Series.to_frame round-trip
+        prices = pd.DataFrame({tickers[0]: data["Close"].to_numpy()},
+                              index=data.index)
+    else:
+        # yfinance returns multi-ticker columns sorted by symbol
+        prices = data.loc[:, "Close"].reindex(
+            columns=[t.upper() for t in tickers])
+        prices.columns = list(tickers)
+    prices.attrs["errors"] = errors
+    return prices
+
+
+def _cached_download(tickers, start_date, end_date, session=None,
+                     yf_session=None):
+    """
+    Download close prices, reusing earlier results for the same request.
+
+    Results are memoized in-process and pickled under _CACHE_DIR. Only
+    complete downloads (every ticker has prices) for windows that have
+    already closed are stored, so failures and still-growing ranges are
+    always fetched again. Callers get a copy, with columns in their
+    requested ticker order, and may modify it freely.
+    """
+    def download():
+        return _download_close(tickers, start_date, end_date, session,
+                               yf_session)
+
+    if os.environ.get("AEQ_NO_CACHE"):
+        return download()
+
+    start, end = _parse_date(start_date), _parse_date(end_date)
+    key = (tuple(sorted(tickers)), start.isoformat(), end.isoformat(),
+           "auto_adjust=True")
+    # The key ignores ticker order, so hits are reindexed to the caller's
+    if key in _MEMORY_CACHE:
+        return _MEMORY_CACHE[key].reindex(columns=list(tickers))
+
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()
+    path = _CACHE_DIR / f"{digest}.pkl"
+    if path.exists():
+        data = pd.read_pickle(path)
+    else:
+        data = download()
+        closed = end <= pd.Timestamp.today().normalize()
+        complete = not data.empty and bool(data.notna().any().all())
+        if not (closed and complete):
+            return data
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        data.to_pickle(path)
+
+    _MEMORY_CACHE[key] = data
+    return data.reindex(columns=list(tickers))
+
+
+def _prices_to_returns(prices):
+    """
+    Convert a frame of daily close prices into daily returns.
+
+    Before calculating % change, ensure no missing gaps exist by copying
+    the previous day's price into any missing slots. Returns are taken as
+    p_t / p_{t-1} - 1 on the underlying array, which drops the first row
+    and avoids DataFrame.pct_change overhead. With Numba installed this
+    runs as a single compiled pass (_kernels.pct_change).
+    """
+    prices = prices.ffill()
+    arr = prices.to_numpy(dtype=np.float64, copy=False)
+    if _kernels.NUMBA_AVAILABLE and arr.ndim == 2:
+        rets = np.empty((max(arr.shape[0] - 1, 0), arr.shape[1]))
+        _kernels.pct_change(arr, rets)
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rets = arr[1:] / arr[:-1] - 1.0
+    rets = pd.DataFrame(rets, index=prices.index[1:], columns=prices.columns)
+    # Drop dates where any ticker has no price yet (e.g. invalid tickers)
+    rets = rets.dropna()
+    # dropna hands back an F-ordered block; re-wrap a C-contiguous copy so
+    # row-wise consumers (e.g. BookKeeper.simulate) read sequential memory
+    vals = np.ascontiguousarray(rets.to_numpy(dtype=np.float64))
+    return pd.DataFrame(vals, index=rets.index, columns=rets.columns,
+                        copy=False)
+
+
+def _fetch_close(ticker, start_date, end_date, yf_session=None):
+    """
+    Download the adjusted close series for a single ticker.
+
+    Returns (close, error). error is None when prices came back; otherwise
+    it is the message history() recorded in yfinance's registry (keyed by
+    upper-case symbol), or a generic one if it recorded none.
+    """
+    hist = yf.Ticker(ticker, session=yf_session).history(
+        start=start_date, end=end_date, auto_adjust=True, actions=False)
+    if "Close" not in hist.columns:
+        return pd.Series(dtype=float, name=ticker), _history_error(ticker)
+    close = hist["Close"].astype("float64").rename(ticker)
+    # Match yf.download, which drops the exchange timezone for daily data
+    if getattr(close.index, "tz", None) is not None:
+        close.index = close.index.tz_localize(None)
+    if not close.notna().any():
+        return close, _history_error(ticker)
+    return close, None
+
+
+def _history_error(ticker):
+    """Return yfinance's recorded error for ticker, or a generic one."""
+    failed = yf.shared._ERRORS  # pylint: disable=protected-access
+    return failed.get(ticker.upper(), "no price data returned")
 
 
 class MarketData:
@@ -18,16 +247,35 @@ class MarketData:
     This class serves as a container for methods that manage financial data,
     such as loading stock data, calculating volatility, or managing portfolio
     metrics.
+
+    Parameters
+    ----------
+    session : requests.Session, optional
+        HTTP session for Yahoo's spark endpoint. Defaults to a pooled
+        session shared by the module.
+    yf_session : curl_cffi.requests.Session, optional
+        Session passed to yfinance, which only accepts curl_cffi sessions.
+        By default yfinance opens a new session for every download.
+
+    Notes
+    -----
+    - Reusing one instance (or one pair of sessions) across fetches keeps
+      connections alive, saving a TCP+TLS handshake per request
     """
 
+    def __init__(self, session=None, yf_session=None):
+        self._session = session
+        self._yf_session = yf_session
+
     def fetch_returns(self, tickers, start_date, end_date):
         """
         Load historical stock price data and compute daily returns.
 
         Parameters
         ----------
-        tickers : list of str
-            Stock ticker symbols (e.g., ['AAPL', 'MSFT', 'GOOGL'])
+        tickers : str or list of str
+            Stock ticker symbols (e.g., ['AAPL', 'MSFT', 'GOOGL']); a single
+            symbol may be passed as a string
         start_date : str
             Start date in 'YYYY-MM-DD' format
         end_date : str
@@ -36,19 +284,73 @@ class MarketData:
         Returns
         -------
         pd.DataFrame
-            Daily returns for each stock (columns = tickers, rows = dates)
+            Daily returns for each stock (columns = tickers, rows = dates).
+            ``attrs["errors"]`` maps each ticker that failed to download to
+            yfinance's error message
+
+        Notes
+        -----
+        - Values are float64 and ``to_numpy()`` returns a C-contiguous
+          (row-major) array, so each date's returns are adjacent in memory
+        - Complete downloads for past date ranges are cached on disk in
+          ``.aequilibrium_cache``; set ``AEQ_NO_CACHE=1`` to always refetch
         """
         # Fetch historical data froa specific period
         # It gets 'Adj Close' prices (adjusted for splits/dividends)
-        # tThis operation downloads data into a pandas DatFrame
-        data = yf.download(tickers, start=start_date,
-                           end=end_date, auto_adjust=True)
+        # tThis operation downloads data into a pandas DatFrame, or reuses
+        # an earlier identical download (see _cached_download)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        prices = _cached_download(tickers, start_date, end_date,
+                                  self._session, self._yf_session)
 
         # Calculate daily fractional change (daily returns)
-        # Before calculating % change, ensure no missing gaps exist by copying 
-        # the previous day's price into any missing slots.
-        rets = data['Close'].ffill().pct_change(fill_method=None)
-        # Drop the first row (NaN from pct_change)
-        rets = rets.dropna()
+        rets = _prices_to_returns(prices)
+        rets.attrs["errors"] = dict(prices.attrs.get("errors", {}))
+
+        return rets
+
+    def fetch_returns_many(self, tickers, start_date, end_date, max_workers=8):
+        """
+        Load daily returns for many tickers using concurrent requests.
+
+        Each ticker's history is a separate Ticker.history() request, so
+        fetching a large universe serially is bound by network round-trips.
+        This method issues those requests from a thread pool instead.
+        Unlike the batched spark path in fetch_returns, where one missing
+        symbol sends the whole request to yf.download, every ticker
+        succeeds or fails on its own.
+
+        Parameters
+        ----------
+        tickers : list of str
+            Stock ticker symbols (e.g., ['AAPL', 'MSFT', 'GOOGL'])
+        start_date : str
+            Start date in 'YYYY-MM-DD' format
+        end_date : str
+            End date in 'YYYY-MM-DD' format
+        max_workers : int, default 8
+            Maximum number of concurrent requests
+
+        Returns
+        -------
+        pd.DataFrame
+            Daily returns for each stock (columns = tickers in the
+            requested order, rows = dates), with the same float64
+            C-contiguous layout as fetch_returns(). As there,
+            ``attrs["errors"]`` maps each ticker that returned no prices
+            to yfinance's error message
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(
+                lambda t: _fetch_close(t, start_date, end_date,
+                                       self._yf_session), tickers))
 
+        closes = [close for close, _ in results]
+        if not closes:
+            prices = pd.DataFrame(dtype=np.float64)
+        else:
+            prices = pd.concat(closes, axis=1).sort_index()
+        rets = _prices_to_returns(prices)
+        rets.attrs["errors"] = {t: err for t, (_, err) in zip(tickers, results)
+                                if err is not None}
         return rets
@@ -0,0 +1,109 @@
+"""
+Shared pytest fixtures.
+
+Network-bound tests can run in parallel with pytest-xdist
+(``pytest -n auto``). Each xdist worker is its own process, so the
+session-scoped HTTP sessions below give every worker one pooled
+connection set that is reused across all of its tests.
+
+Tests marked ``network`` are deselected by default; run them with
+``pytest -m network``. Set ``AEQ_OFFLINE=1`` to replace Yahoo with
+synthetic prices, so even those run without network access.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+from curl_cffi import requests as curl_requests
+from pandas.tseries.holiday import USFederalHolidayCalendar
+from pandas.tseries.offsets import CustomBusinessDay
+from requests.adapters import HTTPAdapter
+
+from aequilibrium import market_data
+
+OFFLINE = bool(os.environ.get("AEQ_OFFLINE"))
+
+_TRADING_DAY = CustomBusinessDay(calendar=USFederalHolidayCalendar())
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    """
+    Pooled requests.Session shared by every test in this worker.
+
+    With AEQ_OFFLINE set this is a stub that refuses every request.
+    """
+    if OFFLINE:
+        yield _OfflineSession()
+        return
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def yf_session():
+    """
+    curl_cffi session shared by every yf.download in this worker.
+
+    yfinance only accepts curl_cffi sessions; without one it opens a new
+    session (and new connections) on every download call.
+    """
+    session = curl_requests.Session(impersonate="chrome")
+    yield session
+    session.close()
+
+
+class _OfflineSession:
+    """Stand-in for the spark requests.Session that refuses every request."""
+
+    def get(self, url, **kwargs):
+        """Fail like an unreachable host."""
+        raise requests.ConnectionError(f"AEQ_OFFLINE is set: {url}")
+
+    def close(self):
+        """Nothing to release."""
+
+
+def _synthetic_download(tickers, start=None, end=None,
+                        multi_level_index=True, **kwargs):
+    """
+    Offline stand-in for yf.download returning random-walk close prices.
+
+    Follows yfinance's layout: trading days in [start, end), multi-ticker
+    columns upper-cased and sorted by symbol, and flat price columns for a
+    single ticker when multi_level_index is False. Every symbol gets
+    prices.
+    """
+    symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+    symbols = sorted({s.upper() for s in symbols})
+    idx = pd.date_range(start, end, freq=_TRADING_DAY, name="Date")
+    idx = idx[idx < pd.Timestamp(end)]
+    rng = np.random.default_rng(0)
+    steps = rng.standard_normal((len(idx), len(symbols)))
+    closes = 100.0 + steps.cumsum(axis=0)
+    if not multi_level_index and len(symbols) == 1:
+        return pd.DataFrame(closes, index=idx, columns=["Close"], copy=False)
+    cols = pd.MultiIndex.from_product([["Close"], symbols],
+                                      names=["Price", "Ticker"])
+    return pd.DataFrame(closes, index=idx, columns=cols, copy=False)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline_market_data():
+    """With AEQ_OFFLINE set, serve synthetic prices instead of Yahoo's."""
+    if not OFFLINE:
+        yield
+        return
+    mp = pytest.MonkeyPatch()
+    # Failed spark requests make MarketData fall back to yf.download
+    mp.setattr(market_data, "_SPARK_SESSION", _OfflineSession())
+    mp.setattr("yfinance.download", _synthetic_download)
+    yield
+    mp.undo()
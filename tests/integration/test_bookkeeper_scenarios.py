@@ -7,12 +7,13 @@ import numpy as np
 from aequilibrium.bookkeeper import BookKeeper
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def bk():
     """
-    Provide a fresh BookKeeper instance for each test.
+    Provide a BookKeeper instance shared by every test in the session.
 
-    Ensures tests are isolated and do not share state.
+    BookKeeper holds no state between calls, so sharing it does not
+    couple tests.
     """
     return BookKeeper()
 
@@ -59,6 +60,36 @@ def test_multi_day_scenario(bk: BookKeeper):
     assert new_leverage == pytest.approx(0.900883, abs=1e-5)
 
 
+def test_multi_day_history_scenario(bk: BookKeeper):
+    """
+    Roll a portfolio forward over several days in one call.
+    Checks the history against the same two days as test_multi_day_scenario,
+    then derives returns and leverage from the rolled holdings.
+    """
+    holdings_0 = np.array([40000.0, 30000.0, 20000.0, 10000.0])
+    returns = np.array([[0.02, 0.01, -0.01, 0.00],
+                        [0.00, 0.00, 0.00, 0.00],
+                        [-0.02, 0.03, 0.01, 0.00]])
+
+    history = bk.roll_forward(holdings_0, returns)
+    assert history.shape == (4, 4)
+    np.testing.assert_allclose(history[1], np.array(
+        [40800.0, 30300.0, 19800.0, 10000.0]))
+    np.testing.assert_allclose(history[2], history[1])
+
+    # Day 1 return and leverage match the step-by-step scenario
+    assert bk.portfolio_return(history[0], history[1]) == pytest.approx(0.009)
+    _, leverage = bk.weights_and_leverage(history[1])
+    assert leverage == pytest.approx(0.900883, abs=1e-5)
+
+    # The batched simulation agrees with the rolled history
+    H, _, _, L, R = bk.simulate(holdings_0, returns)
+    np.testing.assert_allclose(H, history[1:])
+    assert R[0] == pytest.approx(0.009)
+    assert R[1] == pytest.approx(0.0)
+    assert L[0] == pytest.approx(leverage)
+
+
 def test_single_asset_portfolio(bk: BookKeeper):
     """Test portfolio with only one non-cash asset."""
     # Portfolio: $80k in one stock, $20k cash
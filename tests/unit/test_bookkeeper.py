@@ -6,15 +6,17 @@
 import numpy as np
 import pytest
 
+from aequilibrium import _kernels
 from aequilibrium.bookkeeper import BookKeeper
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def bk():
     """
-    Provide a fresh BookKeeper instance for each test.
+    Provide a BookKeeper instance shared by every test in the session.
 
-    Ensures tests are isolated and do not share state.
+    BookKeeper holds no state between calls, so sharing it does not
+    couple tests.
     """
     return BookKeeper()
 
@@ -60,6 +62,45 @@ def test_portfolio_value_empty_array(bk):
     assert bk.portfolio_value(h) == 0.0
 
 
+def test_portfolio_value_returns_python_float(bk):
+    """
+    Portfolio value is returned as a Python float, not a NumPy scalar.
+    """
+    h = np.array([40000, 30000, 20000, 10000])
+    assert type(bk.portfolio_value(h)) is float
+
+
+def test_portfolio_value_small_and_large_portfolios_agree(bk):
+    """
+    Portfolio value is the same on either side of the small-array fast path.
+    """
+    h = np.linspace(-50.0, 150.0, 200)
+    assert bk.portfolio_value(h) == pytest.approx(h.sum())
+    assert bk.portfolio_value(h[:10]) == pytest.approx(h[:10].sum())
+
+
+# -------------------------
+# portfolio_value_weighted tests
+# -------------------------
+def test_portfolio_value_weighted_matches_holdings_sum(bk):
+    """
+    Weighted value equals the sum of dollar holdings p_i * s_i.
+    """
+    prices = np.array([200.0, 50.0, 1.0])
+    shares = np.array([100.0, -40.0, 5000.0])
+    expected = bk.portfolio_value(prices * shares)
+    assert bk.portfolio_value_weighted(prices, shares) == pytest.approx(expected)
+
+
+def test_portfolio_value_weighted_basic(bk):
+    """
+    Weighted value is correct for a simple long-only portfolio.
+    """
+    prices = np.array([10.0, 20.0, 1.0])
+    shares = np.array([3, 2, 30])
+    assert bk.portfolio_value_weighted(prices, shares) == pytest.approx(100.0)
+
+
 # -------------------------
 # compute_weights tests
 # -------------------------
@@ -160,6 +201,48 @@ def test_compute_leverage_is_non_negative(bk):
     assert bk.compute_leverage(w) >= 0.0
 
 
+def test_compute_leverage_does_not_modify_weights(bk):
+    """
+    Computing leverage leaves the input weights untouched.
+    """
+    w = np.array([0.6, -0.3, 0.4, 0.3])
+    bk.compute_leverage(w)
+    np.testing.assert_array_equal(w, np.array([0.6, -0.3, 0.4, 0.3]))
+
+
+# -------------------------
+# weights_and_leverage tests
+# -------------------------
+def test_weights_and_leverage_matches_separate_calls(bk):
+    """
+    Fused computation matches compute_weights() then compute_leverage().
+    """
+    h = np.array([60000.0, -20000.0, 60000.0])
+    w, lev = bk.weights_and_leverage(h)
+    expected_w = bk.compute_weights(h)
+    np.testing.assert_allclose(w, expected_w)
+    assert lev == pytest.approx(bk.compute_leverage(expected_w))
+
+
+def test_weights_and_leverage_negative_portfolio_value(bk):
+    """
+    Leverage stays non-negative when portfolio value is negative.
+    """
+    h = np.array([50000.0, -100000.0, 30000.0])  # v_t = -20000
+    w, lev = bk.weights_and_leverage(h)
+    np.testing.assert_allclose(w, np.array([-2.5, 5.0, -1.5]))
+    assert lev == pytest.approx(7.5)
+
+
+def test_weights_and_leverage_zero_total_value_raises(bk):
+    """
+    Zero portfolio value raises, as in compute_weights().
+    """
+    h = np.array([10.0, -10.0])
+    with pytest.raises(ValueError):
+        bk.weights_and_leverage(h)
+
+
 # -------------------------
 # update_portfolio tests
 # -------------------------
@@ -212,6 +295,52 @@ def test_update_portfolio_with_short_positions(bk):
     np.testing.assert_allclose(
         new_holdings, np.array([40400, -9800, 20600, 5000]))
 
+
+def test_update_portfolio_writes_into_out_buffer(bk):
+    """
+    A caller-provided out buffer receives and is returned as h_{t+1}.
+    """
+    current_holdings = np.array([40000.0, 30000.0, 20000.0, 10000.0])
+    returns = np.array([0.02, 0.01, -0.01, 0.0])
+    out = np.empty(4)
+    new_holdings = bk.update_portfolio(current_holdings, returns, out=out)
+    assert new_holdings is out
+    np.testing.assert_allclose(out, np.array([40800, 30300, 19800, 10000]))
+
+
+def test_update_portfolio_in_place_loop(bk):
+    """
+    Holdings can be rolled forward in place with out=holdings.
+    """
+    holdings = np.array([40000, 30000, 20000, 10000], dtype=float)
+    returns = np.array([0.02, 0.01, -0.01, 0.0])
+    scratch = np.empty(4)
+    for _ in range(2):
+        bk.update_portfolio(holdings, returns, out=holdings, scratch=scratch)
+    np.testing.assert_allclose(holdings, np.array(
+        [41616.0, 30603.0, 19602.0, 10000.0]))
+
+
+def test_update_portfolio_broadcasts_returns(bk):
+    """
+    Without buffers, holdings and returns broadcast like plain NumPy.
+    """
+    holdings = np.array([[100.0, 50.0], [200.0, 10.0]])
+    returns = np.array([0.1, 0.0])
+    np.testing.assert_allclose(bk.update_portfolio(holdings, returns),
+                               holdings * (1 + returns))
+
+
+def test_update_portfolio_does_not_alias_previous_result(bk):
+    """
+    Without out, each call returns a new array that later calls leave alone.
+    """
+    h = np.array([100.0, 100.0])
+    first = bk.update_portfolio(h, np.array([0.1, 0.0]))
+    second = bk.update_portfolio(h, np.array([-0.1, 0.0]))
+    np.testing.assert_allclose(first, np.array([110.0, 100.0]))
+    np.testing.assert_allclose(second, np.array([90.0, 100.0]))
+
 # -------------------------
 # portfolio_return tests
 # -------------------------
@@ -273,3 +402,198 @@ def test_portfolio_return_with_zero_portfolio_value(bk):
     h_t1 = np.array([0, 0, 0, 0])
     ret = bk.portfolio_return(h_t, h_t1)
     assert np.isnan(ret)
+
+
+# -------------------------
+# step tests
+# -------------------------
+def test_step_matches_individual_methods(bk):
+    """
+    A full step matches the individual accounting methods.
+    """
+    h = np.array([40000.0, -10000.0, 20000.0, 5000.0])
+    r = np.array([0.01, -0.02, 0.03, 0.0])
+    h_next, v_next, w_next, lev, ret = bk.step(h, r)
+
+    expected_h = bk.update_portfolio(h, r)
+    np.testing.assert_allclose(h_next, expected_h)
+    assert v_next == pytest.approx(bk.portfolio_value(expected_h))
+    np.testing.assert_allclose(w_next, bk.compute_weights(expected_h))
+    assert lev == pytest.approx(bk.compute_leverage(w_next))
+    assert ret == pytest.approx(bk.portfolio_return(h, expected_h))
+
+
+def test_step_with_integer_holdings(bk):
+    """
+    Non-float64 inputs take the NumPy path with identical results.
+    """
+    h_next, v_next, _, lev, ret = bk.step(
+        np.array([40000, 30000, 20000, 10000]),
+        np.array([0.02, 0.01, -0.01, 0.0]))
+    np.testing.assert_allclose(h_next, np.array([40800, 30300, 19800, 10000]))
+    assert v_next == pytest.approx(100900.0)
+    assert lev == pytest.approx(0.900883, abs=1e-5)
+    assert ret == pytest.approx(0.009)
+
+
+def test_step_zero_portfolio_value_is_nan(bk):
+    """
+    Zero portfolio value yields NaN weights, leverage and return.
+    """
+    _, v_next, w_next, lev, ret = bk.step(np.array([10.0, -10.0]),
+                                          np.array([0.0, 0.0]))
+    assert v_next == 0.0
+    assert np.isnan(w_next).all()
+    assert np.isnan(lev)
+    assert np.isnan(ret)
+
+
+@pytest.mark.parametrize("h, r", [
+    (np.array([40000.0, -10000.0, 20000.0, 5000.0]),
+     np.array([0.01, -0.02, 0.03, 0.0])),
+    (np.array([10.0, -10.0]), np.array([0.0, 0.0])),    # zero v_{t+1}
+])
+def test_step_numpy_fallback_matches_kernel(bk, monkeypatch, h, r):
+    """
+    Without Numba, step() gives the same results through NumPy.
+    """
+    expected = bk.step(h, r)
+    monkeypatch.setattr(_kernels, "NUMBA_AVAILABLE", False)
+    fallback = bk.step(h, r)
+    for a, b in zip(expected, fallback):
+        np.testing.assert_allclose(a, b)
+
+
+# -------------------------
+# roll_forward tests
+# -------------------------
+def test_roll_forward_matches_repeated_updates(bk):
+    """
+    The rolled history matches applying update_portfolio() each period.
+    """
+    h0 = np.array([40000.0, -10000.0, 20000.0, 5000.0])
+    r = np.array([[0.01, -0.02, 0.03, 0.0],
+                  [-0.02, 0.01, 0.00, 0.0]])
+    H = bk.roll_forward(h0, r)
+
+    np.testing.assert_allclose(H[0], h0)
+    h = h0
+    for t in range(r.shape[0]):
+        h = bk.update_portfolio(h, r[t])
+        np.testing.assert_allclose(H[t + 1], h)
+
+
+def test_roll_forward_shape_includes_initial_holdings(bk):
+    """
+    T periods of returns produce T+1 rows of holdings.
+    """
+    H = bk.roll_forward(np.array([60000, 20000, 15000, 5000]),
+                        np.zeros((3, 4)))
+    assert H.shape == (4, 4)
+    np.testing.assert_allclose(H, np.tile([60000, 20000, 15000, 5000], (4, 1)))
+
+
+def test_roll_forward_no_returns(bk):
+    """
+    An empty returns history yields only the initial holdings.
+    """
+    h0 = np.array([80000.0, 20000.0])
+    H = bk.roll_forward(h0, np.empty((0, 2)))
+    np.testing.assert_allclose(H, h0[None, :])
+
+
+# -------------------------
+# simulate tests
+# -------------------------
+def test_simulate_matches_step_by_step_loop(bk):
+    """
+    Batched simulation matches repeated single-period calls.
+
+    Compares every output against the scalar methods applied in a loop.
+    """
+    h0 = np.array([40000.0, 30000.0, 20000.0, 10000.0])
+    r = np.array([[0.02, 0.01, -0.01, 0.0],
+                  [-0.03, 0.02, 0.01, 0.0],
+                  [0.01, -0.01, 0.04, 0.0]])
+    H, V, W, L, R = bk.simulate(h0, r)
+
+    h = h0
+    for t in range(r.shape[0]):
+        h_next = bk.update_portfolio(h, r[t])
+        np.testing.assert_allclose(H[t], h_next)
+        assert V[t] == pytest.approx(bk.portfolio_value(h_next))
+        np.testing.assert_allclose(W[t], bk.compute_weights(h_next))
+        assert L[t] == pytest.approx(bk.compute_leverage(W[t]))
+        assert R[t] == pytest.approx(bk.portfolio_return(h, h_next))
+        h = h_next
+
+
+def test_simulate_output_shapes(bk):
+    """
+    Outputs have one row per period of returns.
+    """
+    h0 = np.array([60000, 20000, 15000, 5000])
+    r = np.zeros((5, 4))
+    H, V, W, L, R = bk.simulate(h0, r)
+    assert H.shape == (5, 4) and W.shape == (5, 4)
+    assert V.shape == (5,) and L.shape == (5,) and R.shape == (5,)
+    np.testing.assert_allclose(R, 0.0)
+
+
+def test_simulate_zero_portfolio_value_is_nan(bk):
+    """
+    Zero portfolio value yields NaN weights, leverage and returns.
+
+    Mirrors portfolio_return() instead of raising like compute_weights().
+    """
+    h0 = np.array([10.0, -10.0])
+    r = np.zeros((2, 2))
+    _, V, W, L, R = bk.simulate(h0, r)
+    np.testing.assert_allclose(V, 0.0)
+    assert np.isnan(W).all()
+    assert np.isnan(L).all()
+    assert np.isnan(R).all()
+
+
+def test_simulate_float32_outputs_and_precision(bk):
+    """
+    A float32 simulation keeps every output in float32 and stays close
+    to the float64 result.
+    """
+    rng = np.random.default_rng(0)
+    h0 = np.array([40000.0, 30000.0, 20000.0, 10000.0])
+    r = rng.normal(0.0, 0.01, size=(250, 4))
+    r[:, -1] = 0.0
+
+    out32 = bk.simulate(h0, r, dtype=np.float32)
+    out64 = bk.simulate(h0, r)
+    for a32, a64 in zip(out32, out64):
+        assert a32.dtype == np.float32
+        assert a64.dtype == np.float64
+        np.testing.assert_allclose(a32, a64, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_simulate_numpy_fallback_matches_kernel(bk, monkeypatch, dtype):
+    """
+    Without Numba, simulate() gives the same results and dtypes via NumPy.
+    """
+    h0 = np.array([60000.0, -20000.0, 60000.0])
+    r = np.array([[0.0, 0.10, 0.0],
+                  [0.02, -0.05, 0.0],
+                  [-1.0, -1.0, -1.0],     # wipes out the portfolio
+                  [0.01, 0.01, 0.0]])
+    expected = bk.simulate(h0, r, dtype=dtype)
+    monkeypatch.setattr(_kernels, "NUMBA_AVAILABLE", False)
+    fallback = bk.simulate(h0, r, dtype=dtype)
+    for a, b in zip(expected, fallback):
+        assert b.dtype == dtype
+        np.testing.assert_allclose(a, b, rtol=1e-6)
+
+
+def test_simulate_rejects_integer_dtype(bk):
+    """
+    Simulation buffers must be floating point.
+    """
+    with pytest.raises(ValueError):
+        bk.simulate(np.array([1.0, 1.0]), np.zeros((1, 2)), dtype=np.int64)
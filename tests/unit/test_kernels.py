@@ -0,0 +1,100 @@
+# pylint: disable=protected-access
+
+"""Unit tests for the compiled BookKeeper kernels."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aequilibrium import _kernels
+
+
+def test_portfolio_value_matches_sum():
+    """
+    The value kernel equals a plain sum of holdings.
+    """
+    h = np.array([100.0, -40.0, 10.0])
+    assert _kernels.portfolio_value(h) == pytest.approx(70.0)
+
+
+def test_simulate_matches_cumprod():
+    """
+    The simulate kernel matches the cumulative-product formulation.
+    """
+    h0 = np.array([60000.0, -20000.0, 60000.0])
+    r = np.array([[0.0, 0.10, 0.0],
+                  [0.02, -0.05, 0.0]])
+    H = np.empty_like(r)
+    V = np.empty(2)
+    L = np.empty(2)
+    _kernels.simulate(h0, r, H, V, L)
+
+    expected_H = h0 * np.cumprod(1 + r, axis=0)
+    np.testing.assert_allclose(H, expected_H)
+    np.testing.assert_allclose(V, expected_H.sum(axis=1))
+    np.testing.assert_allclose(
+        L, np.abs(expected_H[:, :-1]).sum(axis=1) / np.abs(V))
+
+
+def test_simulate_zero_value_leverage_is_nan():
+    """
+    Leverage is NaN in periods where portfolio value is zero.
+    """
+    h0 = np.array([10.0, -10.0])
+    r = np.zeros((1, 2))
+    H, V, L = np.empty_like(r), np.empty(1), np.empty(1)
+    _kernels.simulate(h0, r, H, V, L)
+    assert V[0] == 0.0
+    assert np.isnan(L[0])
+
+
+def test_is_kernel_array_requires_float64_contiguous():
+    """
+    Only 1-D float64 C-contiguous arrays are routed to the kernels.
+    """
+    assert _kernels.is_kernel_array(np.zeros(3), np.ones(3))
+    assert not _kernels.is_kernel_array(np.zeros(3, dtype=np.int64))
+    assert not _kernels.is_kernel_array(np.zeros(6)[::2])
+    assert not _kernels.is_kernel_array([0.0, 1.0])
+
+
+def test_full_step_matches_numpy():
+    """
+    The fused step kernel matches the NumPy formulation of one period.
+    """
+    h = np.array([60000.0, -20000.0, 60000.0])
+    r = np.array([0.0, 0.10, 0.0])
+    h_next = np.empty_like(h)
+    w_next = np.empty_like(h)
+    v_next, lev, ret = _kernels.full_step(h, r, h_next, w_next)
+
+    expected = h * (1 + r)
+    np.testing.assert_allclose(h_next, expected)
+    np.testing.assert_allclose(w_next, expected / expected.sum())
+    assert v_next == pytest.approx(98000.0)
+    assert lev == pytest.approx(82000.0 / 98000.0)
+    assert ret == pytest.approx(-0.02)
+
+
+def test_pct_change_matches_pandas():
+    """
+    The pct_change kernel matches DataFrame.pct_change without its first row.
+    """
+    a = np.array([[100.0, 50.0],
+                  [110.0, np.nan],
+                  [121.0, 55.0],
+                  [99.0, 60.5]])
+    out = np.empty((3, 2))
+    _kernels.pct_change(a, out)
+    expected = pd.DataFrame(a).pct_change(fill_method=None).to_numpy()[1:]
+    np.testing.assert_allclose(out, expected)
+
+
+def test_pct_change_accepts_fortran_order():
+    """
+    Column-major input (as handed back by pandas) gives the same result.
+    """
+    a = np.asfortranarray([[1.0, 2.0, 4.0], [2.0, 3.0, 5.0]])
+    out = np.empty((1, 3))
+    _kernels.pct_change(a, out)
+    np.testing.assert_allclose(out, [[1.0, 0.5, 0.25]])
@@ -1,43 +1,167 @@
 # pylint: disable=redefined-outer-name
 # pylint: disable=protected-access
+# pylint: disable=unused-argument
 
 """Unit tests for MarketData."""
 
+import hashlib
+import os
+import re
+
+import numpy as np
 import pytest
 import pandas as pd
+import yfinance
 import yfinance.shared as shared
 
+from aequilibrium import market_data
 from aequilibrium.market_data import MarketData
 
+# yfinance messages for unknown symbols (HTTP 404, delisted, no timezone)
+_ERR_PAT = re.compile(r"404|not found|no timezone", re.I)
 
-@pytest.fixture
-def md():
+# NYSE closures in the test windows (Jan 2, 2023: New Year's observed)
+_HOLIDAYS = np.array(['2023-01-02', '2023-01-16'], dtype='datetime64[D]')
+
+
+def _first_return_date(start):
+    """Day after the first trading day on or after start."""
+    return pd.Timestamp(np.busday_offset(np.datetime64(start, 'D'), 1,
+                                         roll='forward', holidays=_HOLIDAYS))
+
+
+# Ticker sets for the parametrized live-data tests
+_COLCOUNT_CASES = (('AAPL',), ('AAPL', 'MSFT', 'GOOGL'))
+_INVALID_CASES = (
+    ('NONEXISTENT',),                # Single invalid ticker
+    ('AAPL', 'NOTAREALTICKER'),      # Mixed valid and invalid
+    ('INVALID1', 'INVALID2'),        # Multiple invalid tickers
+)
+
+# fetched keys shared by several live-data tests
+_FULL_YEAR = (('AAPL', 'MSFT'), '2023-01-01', '2023-12-31')
+_AAPL_JAN = (('AAPL',), '2023-01-01', '2023-01-15')  # _fetch_params' window
+
+# Offline synthetic prices (AEQ_OFFLINE, see conftest) accept every symbol
+_needs_yahoo = pytest.mark.skipif(bool(os.environ.get('AEQ_OFFLINE')),
+                                  reason='needs Yahoo to reject symbols')
+
+
+@pytest.fixture(scope="session")
+def _download_memo():
+    """Session-wide memo of live close-price downloads, keyed by request."""
+    return {}
+
+
+@pytest.fixture(autouse=True)
+def cached_download(monkeypatch, _download_memo):
+    """
+    Route close-price downloads through the session memo.
+
+    The memo wraps _download_close, so it covers both the spark endpoint
+    and the yf.download fallback. Each unique (tickers, start, end,
+    sessions) request hits the network once per session. Downloads that
+    reported errors are not memoized, so tests inspecting download errors
+    always see a live call. Calls made while a test patches _fetch_spark
+    or yf.download go straight through.
+    """
+    real_download_close = market_data._download_close
+    live = (market_data._fetch_spark, yfinance.download)
+
+    def cached(tickers, start_date, end_date, session=None, yf_session=None):
+        def download():
+            return real_download_close(tickers, start_date, end_date,
+                                       session, yf_session)
+
+        if (market_data._fetch_spark, yfinance.download) != live:
+            return download()
+        key = (tuple(tickers), start_date, end_date, session, yf_session)
+        if key not in _download_memo:
+            data = download()
+            if data.attrs["errors"]:
+                return data
+            _download_memo[key] = data.copy()
+        return _download_memo[key].copy()
+
+    monkeypatch.setattr(market_data, '_download_close', cached)
+
+
+@pytest.fixture(scope="session")
+def md(http_session, yf_session):
     """
-    Provide a fresh marketData instance for each test.
+    Provide one MarketData instance shared by every test.
 
-    Ensures tests are isolated and do not share state.
+    It holds only the worker's pooled sessions (see conftest), so every
+    live request reuses open connections. Tests patch yfinance at module
+    level rather than on the instance, so sharing it keeps tests isolated.
+    Live downloads are shared through cached_download.
     """
-    return MarketData()
+    return MarketData(session=http_session, yf_session=yf_session)
 
 # Helper function to clear errors before and after tests
 
 
 @pytest.fixture(autouse=True)
 def clear_yf_errors():
-    """Fixture to ensure shared._ERRORS is clear before and after each test."""
+    """
+    Run each test against an empty shared._ERRORS, then restore it.
+
+    Whatever the registry held before the test is put back afterwards,
+    so tests do not leak yfinance errors into each other.
+    """
+    saved = dict(shared._ERRORS)
     shared._ERRORS.clear()
     yield
     shared._ERRORS.clear()
+    shared._ERRORS.update(saved)
 
 
-def test_fetch_returns_structure(md):
+@pytest.fixture(autouse=True)
+def no_download_cache(monkeypatch):
+    """Keep tests from reading or writing the on-disk download cache."""
+    monkeypatch.setenv('AEQ_NO_CACHE', '1')
+
+
+@pytest.fixture(scope="session")
+def fetched(request, md):
+    """
+    Fetch returns once per (tickers, start, end) and share the frame.
+
+    Parametrize indirectly with ``(tickers, start, end)``; pytest groups
+    the tests using the same key, so they reuse one download. Session-
+    scoped fixtures are set up before the per-test cache fixtures, so this
+    one bypasses the download cache itself. Tests must not modify the
+    returned frame.
+    """
+    tickers, start, end = request.param
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('AEQ_NO_CACHE', '1')
+        data = md.fetch_returns(list(tickers), start, end)
+    return data
+
+
+def _fetch_params(*ticker_sets, start='2023-01-01', end='2023-01-15'):
+    """Pair each ticker tuple with its ``fetched`` key for parametrize."""
+    return [(tickers, (tuple(tickers), start, end))
+            for tickers in ticker_sets]
+
+
+@pytest.fixture
+def download_cache(monkeypatch, tmp_path):
+    """Enable the download cache in an isolated, empty directory."""
+    monkeypatch.delenv('AEQ_NO_CACHE')
+    monkeypatch.setattr(market_data, '_CACHE_DIR', tmp_path)
+    monkeypatch.setattr(market_data, '_MEMORY_CACHE', {})
+    return tmp_path
+
+
+@pytest.mark.parametrize("fetched", [_FULL_YEAR], indirect=True)
+@pytest.mark.network
+def test_fetch_returns_structure(fetched):
     """
     Test that the fetch method returns a DataFrame with correct structure.
     """
-    tickers = ['AAPL', 'MSFT']
-    start_date = '2023-01-01'
-    end_date = '2023-12-31'
-    data = md.fetch_returns(tickers, start_date, end_date)
+    data = fetched
 
     # 1. Check if the result is a pandas DataFrame
     assert isinstance(data, pd.DataFrame)
@@ -53,19 +177,19 @@ def test_fetch_returns_structure(md):
     assert not data.head().empty
 
 
-def test_fetch_no_nan_values(md):
+@pytest.mark.parametrize("fetched", [_FULL_YEAR], indirect=True)
+@pytest.mark.network
+def test_fetch_no_nan_values(fetched):
     """
     Test that the returned DataFrame contains no NaN values after dropping the first row.
     """
-    tickers = ['AAPL', 'MSFT']
-    start_date = '2023-01-01'
-    end_date = '2023-12-31'
-    data = md.fetch_returns(tickers, start_date, end_date)
+    data = fetched
 
     # Verify there are no missing values anywhere in the DataFrame
-    assert not data.isna().any().any()
+    assert not np.isnan(data.to_numpy(copy=False)).any()
 
 
+@pytest.mark.network
 def test_fetch_single_ticker(md):
     """
     Ensure the method works correctly when fetching data for a single stock.
@@ -79,44 +203,522 @@ def test_fetch_single_ticker(md):
     assert len(data) > 15
 
 
-def test_returns_date_alignment(md):
+@pytest.mark.parametrize("fetched", [_AAPL_JAN], indirect=True)
+@pytest.mark.network
+def test_returns_date_alignment(fetched):
     """
     Testing a range with a weekend (Jan 1, 2023 was a Sunday)
     """
-    data = md.fetch_returns(['AAPL'], '2023-01-01', '2023-01-10')
+    _, start, _ = _AAPL_JAN
     # First trading day was Jan 3rd, pct_change makes first return Jan 4th
-    assert data.index[0] == pd.Timestamp('2023-01-04')
+    assert fetched.index[0] == _first_return_date(start)
 
 
-@pytest.mark.parametrize("tickers", [['AAPL'], ['AAPL', 'MSFT', 'GOOGL']])
-def test_returns_column_count(md, tickers):
+@pytest.mark.parametrize("tickers, fetched",
+                         _fetch_params(*_COLCOUNT_CASES),
+                         indirect=["fetched"])
+@pytest.mark.network
+def test_returns_column_count(fetched, tickers):
     """
     Verify that the returned data frame contains one column for each requested ticker.
     """
-    data = md.fetch_returns(tickers, '2023-01-01', '2023-01-15')
-    assert len(data.columns) == len(tickers)
+    assert len(fetched.columns) == len(tickers)
 
 
-@pytest.mark.parametrize("invalid_tickers", [
-    (['NONEXISTENT']),               # Single invalid ticker
-    (['AAPL', 'NOTAREALTICKER']),    # Mixed valid and invalid
-    (['INVALID1', 'INVALID2'])       # Multiple invalid tickers
-])
-def test_detects_invalid_tickers(md, invalid_tickers):
+@pytest.mark.parametrize("invalid_tickers, fetched",
+                         _fetch_params(*_INVALID_CASES), indirect=["fetched"])
+@pytest.mark.network
+@_needs_yahoo
+def test_detects_invalid_tickers(fetched, invalid_tickers):
     """
     Test that invalid ticker symbols are correctly identified
     """
-    md.fetch_returns(invalid_tickers, '2023-01-01', '2023-01-15')
+    errors = fetched.attrs['errors']
 
-    # Check if the specific invalid tickers were captured in _ERRORS
+    # Check if the specific invalid tickers were captured in the errors
     for ticker in invalid_tickers:
         if ticker == 'AAPL':  # Skip valid ones if testing mixed sets
             continue
 
         # Verify the ticker exists as a key in the errors dictionary
-        assert ticker in shared._ERRORS
+        assert ticker in errors
 
         # Verify the error message contains '404' or 'not found'
-        error_msg = str(shared._ERRORS[ticker])
-        assert any(x in error_msg.lower()
-            for x in ["404", "not found", "no timezone"])
+        error_msg = str(errors[ticker])
+        assert _ERR_PAT.search(error_msg)
+
+
+def _assert_empty_df(data, cols):
+    """Assert data is an empty DataFrame with exactly the given columns."""
+    assert type(data) is pd.DataFrame  # pylint: disable=unidiomatic-typecheck
+    assert data.empty
+    assert data.columns.tolist() == list(cols)
+
+
+class _FakeTicker:
+    """Stand-in for yfinance.Ticker serving fixed exchange-local prices."""
+
+    CLOSES = {
+        'AAPL': np.array([100.0, 101.0, 99.99, 102.0]),
+        'MSFT': np.array([200.0, 200.0, 210.0, 205.0]),
+    }
+    SILENT = {'EMPTY'}
+
+    def __init__(self, ticker, session=None):
+        self.ticker = ticker
+
+    def history(self, start=None, end=None, **kwargs):
+        """
+        Return a tz-aware OHLC-style frame, empty for unknown tickers.
+
+        Like yfinance, unknown tickers are recorded in shared._ERRORS,
+        except those in SILENT.
+        """
+        if self.ticker not in self.CLOSES:
+            if self.ticker not in self.SILENT:
+                shared._ERRORS[self.ticker.upper()] = (
+                    'possibly delisted; no timezone found')
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close'])
+        idx = pd.date_range(start, periods=4, freq='B',
+                            tz='America/New_York', name='Date')
+        return pd.DataFrame(self.CLOSES[self.ticker].reshape(-1, 1),
+                            index=idx, columns=['Close'], copy=False)
+
+
+def test_fetch_returns_many_matches_requested_order(md, monkeypatch):
+    """
+    Concurrent fetch returns one column per ticker in the requested order.
+    """
+    monkeypatch.setattr('yfinance.Ticker', _FakeTicker)
+    data = md.fetch_returns_many(['MSFT', 'AAPL'], '2023-01-02', '2023-01-06')
+
+    assert list(data.columns) == ['MSFT', 'AAPL']
+    assert len(data) == 3
+    assert data.index.tz is None
+    assert data['MSFT'].iloc[1] == pytest.approx(0.05)
+
+
+def test_fetch_returns_many_with_invalid_ticker(md, monkeypatch):
+    """
+    A ticker with no price history leaves no complete rows, as in fetch_returns.
+    """
+    monkeypatch.setattr('yfinance.Ticker', _FakeTicker)
+    data = md.fetch_returns_many(['AAPL', 'NOTAREALTICKER'],
+                                 '2023-01-02', '2023-01-06')
+
+    _assert_empty_df(data, ['AAPL', 'NOTAREALTICKER'])
+
+
+def test_fetch_returns_many_reports_missing_tickers(md, monkeypatch,
+                                                    clear_yf_errors):
+    """
+    Tickers with no price history are listed in attrs['errors'].
+    """
+    monkeypatch.setattr('yfinance.Ticker', _FakeTicker)
+    data = md.fetch_returns_many(['AAPL', 'notarealticker', 'EMPTY'],
+                                 '2023-01-02', '2023-01-06')
+
+    assert data.attrs['errors'] == {
+        'notarealticker': 'possibly delisted; no timezone found',
+        'EMPTY': 'no price data returned',
+    }
+
+    data = md.fetch_returns_many(['MSFT', 'AAPL'], '2023-01-02', '2023-01-06')
+    assert data.attrs['errors'] == {}
+
+
+def test_fetch_returns_many_empty_ticker_list(md):
+    """
+    An empty ticker list gives an empty frame, as with fetch_returns.
+    """
+    data = md.fetch_returns_many([], '2023-01-02', '2023-01-06')
+
+    _assert_empty_df(data, [])
+    assert data.attrs['errors'] == {}
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    """
+    Serve synthetic close prices instead of hitting the network.
+
+    Disables the spark endpoint and returns an installer: call it with rows
+    of close prices to patch yfinance.download. Like yfinance, columns are
+    labelled with upper-cased symbols. The installer returns a list
+    recording the tickers of every download call.
+    """
+    monkeypatch.setattr(market_data, '_fetch_spark', lambda *args: None)
+
+    def install(closes):
+        calls = []
+        # Build frames straight from a float64 block, skipping inference
+        closes = np.asarray(closes, dtype=np.float64)
+
+        def download(tickers, start=None, end=None, multi_level_index=True,
+                     **kwargs):
+            calls.append(tickers)
+            idx = pd.date_range(start, periods=len(closes), freq='B',
+                                name='Date')
+            if not multi_level_index and len(tickers) == 1:
+                return pd.DataFrame(closes, index=idx, columns=['Close'],
+                                    copy=False)
+            cols = pd.MultiIndex.from_product(
+                [['Close'], [t.upper() for t in tickers]],
+                names=['Price', 'Ticker'])
+            return pd.DataFrame(closes, index=idx, columns=cols, copy=False)
+
+        monkeypatch.setattr('yfinance.download', download)
+        return calls
+    return install
+
+
+def test_fetch_returns_forward_fills_gaps(md, fake_download):
+    """
+    Missing prices are forward-filled before returns are computed.
+    """
+    fake_download([[100.0, 50.0], [110.0, float('nan')], [121.0, 55.0]])
+    data = md.fetch_returns(['AAPL', 'MSFT'], '2023-01-02', '2023-01-05')
+
+    assert list(data.index) == list(pd.date_range('2023-01-03', periods=2,
+                                                  freq='B'))
+    assert data['AAPL'].tolist() == pytest.approx([0.1, 0.1])
+    assert data['MSFT'].tolist() == pytest.approx([0.0, 0.1])
+
+
+def test_zero_variance_ticker_handling(md, fake_download):
+    """
+    A ticker whose price never moves gets all-zero returns, not NaN.
+    """
+    fake_download([[100.0, 50.0], [100.0, 55.0], [100.0, 60.5],
+                   [100.0, 55.0]])
+    data = md.fetch_returns(['AAPL', 'MSFT'], '2023-01-02', '2023-01-06')
+
+    arr = data['AAPL'].to_numpy(copy=False)
+    assert len(arr) == 3
+    assert not arr.any()
+
+
+def test_fetch_returns_lowercase_tickers(md, fake_download, monkeypatch):
+    """
+    Lower-case symbols match yfinance's upper-cased columns and errors,
+    and come back under the caller's spelling.
+    """
+    fake_download([[100.0, 50.0], [110.0, 55.0], [121.0, 60.5]])
+    data = md.fetch_returns(['aapl', 'msft'], '2023-01-02', '2023-01-05')
+
+    assert list(data.columns) == ['aapl', 'msft']
+    assert data['aapl'].tolist() == pytest.approx([0.1, 0.1])
+    assert data['msft'].tolist() == pytest.approx([0.1, 0.1])
+
+    fake_download([[100.0, float('nan')], [110.0, float('nan')]])
+    fake = yfinance.download
+
+    def download(tickers, *args, **kwargs):
+        data = fake(tickers, *args, **kwargs)
+        shared._ERRORS['NOTAREALTICKER'] = 'YFTzMissingError: no timezone'
+        return data
+
+    monkeypatch.setattr('yfinance.download', download)
+    data = md.fetch_returns(['aapl', 'notarealticker'],
+                            '2023-01-02', '2023-01-04')
+    assert data.attrs['errors'] == {
+        'notarealticker': 'YFTzMissingError: no timezone'}
+
+
+def test_fetch_returns_is_c_contiguous_float64(md, fake_download):
+    """
+    Returned values are float64 and laid out row-major (C-contiguous).
+    """
+    fake_download([[100.0, 50.0, 10.0], [101.0, 51.0, 11.0],
+                   [102.0, 52.0, 12.0], [103.0, 53.0, 13.0]])
+    data = md.fetch_returns(['AAPL', 'MSFT', 'GOOGL'],
+                            '2023-01-02', '2023-01-06')
+
+    arr = data.to_numpy()
+    assert arr.dtype == np.float64
+    assert arr.flags.c_contiguous
+
+
+def _assert_identical_frames(data1, data2):
+    """Assert two frames hold byte-identical values with the same labels."""
+    a1, a2 = data1.to_numpy(), data2.to_numpy()
+    assert a1.shape == a2.shape and a1.dtype == a2.dtype
+    assert (hashlib.blake2b(a1.tobytes()).digest()
+            == hashlib.blake2b(a2.tobytes()).digest())
+    assert data1.index.equals(data2.index)
+    assert list(data1.columns) == list(data2.columns)
+
+
+def test_fetch_returns_reuses_cached_download(md, fake_download,
+                                              download_cache, monkeypatch):
+    """
+    Identical requests are downloaded once and then served from the cache.
+    """
+    calls = fake_download([[100.0, 50.0], [110.0, 55.0], [121.0, 60.5]])
+
+    data1 = md.fetch_returns(['AAPL', 'MSFT'], '2023-01-02', '2023-01-05')
+    data2 = md.fetch_returns(['AAPL', 'MSFT'], '2023-01-02', '2023-01-05')
+
+    assert len(calls) == 1
+    assert len(list(download_cache.glob('*.pkl'))) == 1
+    _assert_identical_frames(data1, data2)
+
+    # A fresh process (empty memory cache) reads the pickle instead
+    monkeypatch.setattr(market_data, '_MEMORY_CACHE', {})
+    data3 = md.fetch_returns(['AAPL', 'MSFT'], '2023-01-02', '2023-01-05')
+    assert len(calls) == 1
+    _assert_identical_frames(data1, data3)
+
+
+def test_fetch_returns_cache_key_normalizes_dates(md, fake_download,
+                                                 download_cache):
+    """
+    Equivalent date spellings and ticker orders share one cache entry.
+    """
+    calls = fake_download([[100.0, 50.0], [110.0, 55.0]])
+
+    md.fetch_returns(['AAPL', 'MSFT'], '2023-01-02', '2023-01-04')
+    md.fetch_returns(['MSFT', 'AAPL'], '2023-1-2', '2023-1-4')
+
+    assert len(calls) == 1
+    assert len(list(download_cache.glob('*.pkl'))) == 1
+
+
+def test_fetch_returns_does_not_cache_incomplete_download(md, fake_download,
+                                                          download_cache):
+    """
+    Downloads with a ticker missing all prices are fetched again every time.
+    """
+    calls = fake_download([[100.0, float('nan')], [110.0, float('nan')]])
+
+    md.fetch_returns(['AAPL', 'NOTAREALTICKER'], '2023-01-02', '2023-01-04')
+    data = md.fetch_returns(['AAPL', 'NOTAREALTICKER'],
+                            '2023-01-02', '2023-01-04')
+
+    _assert_empty_df(data, ['AAPL', 'NOTAREALTICKER'])
+    assert len(calls) == 2
+    assert not list(download_cache.glob('*.pkl'))
+
+
+def test_fetch_returns_skips_cache_when_disabled(md, fake_download):
+    """
+    With AEQ_NO_CACHE set, every call goes to yfinance.
+    """
+    calls = fake_download([[100.0], [110.0]])
+
+    md.fetch_returns(['AAPL'], '2023-01-02', '2023-01-04')
+    md.fetch_returns(['AAPL'], '2023-01-02', '2023-01-04')
+
+    assert len(calls) == 2
+
+
+def test_fetch_returns_single_ticker_flat_columns(md, fake_download):
+    """
+    Single-ticker downloads with flat price columns are labelled by ticker.
+    """
+    fake_download([[100.0], [110.0], [99.0]])
+    data = md.fetch_returns(['AAPL'], '2023-01-02', '2023-01-05')
+
+    assert list(data.columns) == ['AAPL']
+    assert data['AAPL'].tolist() == pytest.approx([0.1, -0.1])
+
+
+def test_fetch_returns_string_ticker(md, fake_download):
+    """
+    A single ticker passed as a string is fetched as one symbol.
+    """
+    calls = fake_download([[100.0], [110.0], [99.0]])
+    data = md.fetch_returns('AAPL', '2023-01-02', '2023-01-05')
+
+    assert calls == [['AAPL']]
+    assert list(data.columns) == ['AAPL']
+    assert data['AAPL'].tolist() == pytest.approx([0.1, -0.1])
+
+
+@pytest.mark.parametrize("exc", [ValueError, ConnectionError, TimeoutError,
+                                 OSError])
+def test_fetch_returns_yf_download_exception(md, fake_download, monkeypatch,
+                                             exc):
+    """
+    Exceptions raised by yf.download propagate out of fetch_returns.
+    """
+    def boom(*args, **kwargs):
+        raise exc("bad")
+
+    monkeypatch.setattr('yfinance.download', boom)
+    with pytest.raises(exc, match="bad"):
+        md.fetch_returns(['AAPL'], '2023-01-01', '2023-01-05')
+
+
+def test_fetch_returns_reports_download_errors(md, fake_download,
+                                              monkeypatch):
+    """
+    Tickers yfinance failed to download are listed in attrs['errors'].
+    """
+    fake_download([[100.0, float('nan')], [110.0, float('nan')]])
+    fake = yfinance.download
+
+    def download(tickers, *args, **kwargs):
+        data = fake(tickers, *args, **kwargs)
+        shared._ERRORS['NOTAREALTICKER'] = 'YFTzMissingError: no timezone'
+        shared._ERRORS['UNRELATED'] = 'stale'
+        return data
+
+    monkeypatch.setattr('yfinance.download', download)
+    data = md.fetch_returns(['AAPL', 'NOTAREALTICKER'],
+                            '2023-01-02', '2023-01-04')
+
+    assert data.attrs['errors'] == {
+        'NOTAREALTICKER': 'YFTzMissingError: no timezone'}
+
+
+def test_column_order_matches_requested_tickers(md, fake_download,
+                                               download_cache, monkeypatch):
+    """
+    One batched download serves all tickers, in the order requested.
+    """
+    calls = []
+
+    def download(tickers, start=None, end=None, **kwargs):
+        # Like yfinance, return the columns sorted by symbol
+        calls.append(tickers)
+        symbols = sorted(tickers)
+        idx = pd.date_range(start, periods=2, freq='B', name='Date')
+        cols = pd.MultiIndex.from_product([['Close'], symbols])
+        prices = {'AAPL': 100.0, 'GOOGL': 10.0, 'MSFT': 50.0}
+        return pd.DataFrame([[prices[s] for s in symbols],
+                             [prices[s] * 1.1 for s in symbols]],
+                            index=idx, columns=cols)
+
+    monkeypatch.setattr('yfinance.download', download)
+    data = md.fetch_returns(['MSFT', 'AAPL', 'GOOGL'],
+                            '2023-01-02', '2023-01-04')
+    assert calls == [['MSFT', 'AAPL', 'GOOGL']]
+    assert list(data.columns) == ['MSFT', 'AAPL', 'GOOGL']
+
+    # Cache hits follow the new request's order, not the stored one
+    data = md.fetch_returns(['GOOGL', 'MSFT', 'AAPL'],
+                            '2023-01-02', '2023-01-04')
+    assert len(calls) == 1
+    assert list(data.columns) == ['GOOGL', 'MSFT', 'AAPL']
+
+
+# 2023-01-03 14:30 UTC (09:30 New York) and the following two days
+_SPARK_TIMESTAMPS = [1672756200, 1672842600, 1672929000]
+
+
+def _spark_payload(closes):
+    """Build a spark JSON response for a {symbol: adjclose list} mapping."""
+    return {'spark': {'result': [
+        {'symbol': symbol, 'response': [{
+            'meta': {'gmtoffset': -18000},
+            'timestamp': _SPARK_TIMESTAMPS[:len(adj)],
+            'indicators': {'adjclose': [{'adjclose': adj}]},
+        }]}
+        for symbol, adj in closes.items()
+    ]}}
+
+
+class _FakeSpark:
+    """Stand-in for requests.Session serving canned spark responses."""
+
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        """Record the request and return self as the response."""
+        self.requests.append(params)
+        return self
+
+    def json(self):
+        """Return the canned payload, or one built from requested symbols."""
+        if self.payload is not None:
+            return self.payload
+        symbols = self.requests[-1]['symbols'].split(',')
+        return _spark_payload({s: [1.0, 1.0] for s in symbols})
+
+
+def test_fetch_returns_uses_spark_endpoint(monkeypatch):
+    """
+    Spark responses are parsed into returns without calling yf.download.
+    """
+    spark = _FakeSpark(payload=_spark_payload({
+        'MSFT': [200.0, None, 210.0],
+        'AAPL': [100.0, 110.0, 121.0],
+    }))
+    monkeypatch.setattr('yfinance.download', None)
+    data = MarketData(session=spark).fetch_returns(['AAPL', 'MSFT'],
+                                                   '2023-01-03', '2023-01-06')
+
+    assert len(spark.requests) == 1
+    assert spark.requests[0]['symbols'] == 'AAPL,MSFT'
+    assert list(data.columns) == ['AAPL', 'MSFT']
+    assert list(data.index) == list(pd.to_datetime(['2023-01-04',
+                                                    '2023-01-05']))
+    assert data['AAPL'].tolist() == pytest.approx([0.1, 0.1])
+    assert data['MSFT'].tolist() == pytest.approx([0.0, 0.05])
+
+    # A single ticker may be passed as a string
+    spark = _FakeSpark(payload=_spark_payload({'AAPL': [100.0, 110.0]}))
+    data = MarketData(session=spark).fetch_returns('AAPL', '2023-01-03',
+                                                   '2023-01-05')
+    assert spark.requests[0]['symbols'] == 'AAPL'
+    assert list(data.columns) == ['AAPL']
+
+
+def test_fetch_spark_lowercase_tickers():
+    """
+    Spark requests and matches upper-case symbols, keeping caller labels.
+    """
+    spark = _FakeSpark(payload=_spark_payload({
+        'AAPL': [100.0, 110.0, 121.0],
+        'MSFT': [200.0, 200.0, 210.0],
+    }))
+    prices = market_data._fetch_spark(['msft', 'aapl'], '2023-01-03',
+                                      '2023-01-06', spark)
+
+    assert spark.requests[0]['symbols'] == 'MSFT,AAPL'
+    assert list(prices.columns) == ['msft', 'aapl']
+    assert prices['aapl'].tolist() == [100.0, 110.0, 121.0]
+
+
+def test_fetch_spark_chunks_symbols(monkeypatch):
+    """
+    Symbols are requested in chunks of at most 20 per call.
+    """
+    spark = _FakeSpark()
+    monkeypatch.setattr(market_data, '_spark_session', lambda: spark)
+    tickers = [f'T{i}' for i in range(25)]
+    prices = market_data._fetch_spark(tickers, '2023-01-03', '2023-01-06')
+
+    assert [len(p['symbols'].split(',')) for p in spark.requests] == [20, 5]
+    assert list(prices.columns) == tickers
+
+
+@pytest.mark.parametrize('spark', [
+    _FakeSpark(status_code=404),                       # HTTP error
+    _FakeSpark(payload={'spark': {'result': None}}),   # schema mismatch
+    _FakeSpark(payload=_spark_payload({'AAPL': [1.0, 1.0]})),  # missing symbol
+])
+def test_fetch_returns_falls_back_to_yf_download(monkeypatch, spark):
+    """
+    Failed or unexpected spark responses fall back to yf.download.
+    """
+    calls = []
+    yf_session = object()
+
+    def download(tickers, start=None, end=None, session=None, **kwargs):
+        assert session is yf_session
+        calls.append(tickers)
+        idx = pd.date_range(start, periods=2, freq='B', name='Date')
+        cols = pd.MultiIndex.from_product([['Close'], tickers])
+        return pd.DataFrame([[1.0, 2.0], [1.1, 2.2]], index=idx, columns=cols)
+
+    monkeypatch.setattr('yfinance.download', download)
+    md = MarketData(session=spark, yf_session=yf_session)
+    data = md.fetch_returns(['AAPL', 'MSFT'], '2023-01-03', '2023-01-06')
+
+    assert calls == [['AAPL', 'MSFT']]
+    np.testing.assert_allclose(data.to_numpy(), [[0.1, 0.1]])